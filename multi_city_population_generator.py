@@ -3,6 +3,8 @@ import pandas as pd
 import numpy as np
 import random
 
+from sampling import AliasTable, sample_sizes
+
 # -------------- PARAMETERS --------------
 # Example configuration for N cities
 # CITIES = ["CityA", "CityB", "CityC"]  # Extend or reduce as needed
@@ -26,6 +28,14 @@ SINGLE_COMPARTMENT = False
 
 INFECTIVITIES = ["Normal"]  # You can keep multiple if desired, e.g. ["Normal", "High"]
 
+# Empirical distributions, sampled with alias tables. None keeps the uniform
+# defaults (ages 5-59, HOUSEHOLD_SIZE / OFFICE_SIZE members per place).
+AGE_DISTRIBUTION = None  # {(low, high): weight}, e.g. {(5, 18): 0.3, (18, 60): 0.7}
+HOUSEHOLD_SIZE_DISTRIBUTION = None  # {size: weight}, e.g. {1: 0.1, 4: 0.6, 6: 0.3}
+OFFICE_SIZE_DISTRIBUTION = None  # {size: weight}
+# Per-city {infectivity: weight}; cities not listed draw uniformly from INFECTIVITIES
+INFECTIVITY_DISTRIBUTION = None
+
 SAVE_ENTITIES = False
 
 # Geographic bounding box for random lat/long
@@ -47,11 +57,52 @@ TRAVEL_PROB_MAP = {
     "Nashik": 0.00909090909,
     "Pune": 0.0114285714,
 }
+TRAVEL_DURATION = 7  # Days spent in the travel city per trip
+
+# Pre-sample every agent's trips over the whole horizon instead of leaving
+# the daily Bernoulli roll to the simulator
+PRESAMPLE_TRAVEL = False
+DAYS = 150  # Should match DAYS in config.toml
+
+# Reorder agents so that households, neighbourhoods and offices/schools are
+# contiguous in the output, renumbering houses, offices and schools to match
+REORDER_AGENTS = False
 
 # -------------- FUNCTIONS --------------
 
 
-def generate_population(city_name, city_id, total_population):
+def build_samplers():
+    """
+    Builds the alias tables for the configured distributions once, so they
+    are shared by every city. Unset distributions get no table (None, or no
+    entry for the city) and keep the plain uniform draws.
+    """
+    return {
+        "age": (
+            AliasTable.from_bands(AGE_DISTRIBUTION)
+            if AGE_DISTRIBUTION and not SINGLE_COMPARTMENT
+            else None
+        ),
+        "infectivity": {
+            city: AliasTable.from_dict(distribution)
+            for city, distribution in (INFECTIVITY_DISTRIBUTION or {}).items()
+        },
+        "household_size": (
+            AliasTable.from_dict(HOUSEHOLD_SIZE_DISTRIBUTION)
+            if HOUSEHOLD_SIZE_DISTRIBUTION
+            else None
+        ),
+        "office_size": (
+            AliasTable.from_dict(OFFICE_SIZE_DISTRIBUTION)
+            if OFFICE_SIZE_DISTRIBUTION
+            else None
+        ),
+        # Filled per city once the offices exist, see main()
+        "offices": {},
+    }
+
+
+def generate_population(city_name, city_id, total_population, samplers):
     """
     Generates a population DataFrame for the given city:
       - AgentID (unique per city)
@@ -63,14 +114,29 @@ def generate_population(city_name, city_id, total_population):
     """
     agent_ids = city_id * total_population + np.arange(1, total_population + 1)
 
+    # Configured distributions share one index buffer and write into
+    # preallocated columns
+    indices = np.empty(total_population, dtype=np.int64)
+
     # Ages
-    if SINGLE_COMPARTMENT:
+    age_sampler = samplers["age"]
+    if age_sampler is not None:
+        ages = np.empty(total_population, dtype=age_sampler.values.dtype)
+        age_sampler.sample(total_population, out=ages, indices=indices)
+    elif SINGLE_COMPARTMENT:
         ages = np.random.randint(20, 60, size=total_population)
     else:
         ages = np.random.randint(5, 60, size=total_population)
 
     # Infectivity types
-    infectivies = np.random.choice(INFECTIVITIES, size=total_population)
+    infectivity_sampler = samplers["infectivity"].get(city_name)
+    if infectivity_sampler is not None:
+        infectivies = np.empty(
+            total_population, dtype=infectivity_sampler.values.dtype
+        )
+        infectivity_sampler.sample(total_population, out=infectivies, indices=indices)
+    else:
+        infectivies = np.random.choice(INFECTIVITIES, size=total_population)
 
     # Classify by age
     workers = ages >= 18
@@ -93,11 +159,14 @@ def generate_population(city_name, city_id, total_population):
     return df
 
 
-def generate_entities(population, current_entity_count):
+def generate_entities(population, current_entity_count, samplers):
     """
     Generates houses, hotels, offices, schools, and neighborhoods
     for the given city's population. Returns lists/dicts describing
     these entities, along with updated counts so IDs don't overlap across cities.
+
+    When a household/office size distribution is configured, houses and
+    offices also get a "Size" drawn from it.
     """
     total_population = len(population)
     total_students = population["IsStudent"].sum()
@@ -108,6 +177,16 @@ def generate_entities(population, current_entity_count):
     total_hotels = total_population // HOTEL_SIZE
     total_offices = total_workers // OFFICE_SIZE
     total_schools = total_students // SCHOOL_SIZE
+    house_sizes = None
+    office_sizes = None
+    if not SINGLE_COMPARTMENT:
+        if samplers["household_size"] is not None:
+            house_sizes = sample_sizes(samplers["household_size"], total_population)
+            total_houses = len(house_sizes)
+        if samplers["office_size"] is not None:
+            office_sizes = sample_sizes(samplers["office_size"], total_workers)
+            total_offices = len(office_sizes)
+
     # Simplify to at least 1 neighborhood
     total_neighbourhoods = max(1, total_houses // NEIGHBOURHOOD_SIZE)
 
@@ -129,6 +208,9 @@ def generate_entities(population, current_entity_count):
         }
         for h_id in houses_ids
     ]
+    if house_sizes is not None:
+        for house, size in zip(houses, house_sizes):
+            house["Size"] = int(size)
 
     # ----- Generate Hotels -----
     hotels_ids = np.arange(1, total_hotels + 1) + current_entity_count["hotels"]
@@ -152,6 +234,9 @@ def generate_entities(population, current_entity_count):
         }
         for o_id in offices_ids
     ]
+    if office_sizes is not None:
+        for office, size in zip(offices, office_sizes):
+            office["Size"] = int(size)
 
     # ----- Generate Schools -----
     schools_ids = np.arange(1, total_schools + 1) + current_entity_count["schools"]
@@ -224,10 +309,12 @@ def generate_entities(population, current_entity_count):
     return houses, hotels, offices, schools, neighbourhoods
 
 
-def assign_entities_to_city(population, city_name, cities, entities):
+def assign_entities_to_city(population, city_name, cities, entities, samplers):
     """
     For each agent in 'population' (which belongs to city_name),
-    assign a House (and HouseNeighbourhood) from its own city.
+    assign a House (and HouseNeighbourhood) from its own city. Houses with a
+    "Size" are filled to exactly that many members; offices are drawn in
+    proportion to their "Size" (uniformly when unsized).
     Then, for *every* city in the entire cities list, assign:
        - OfficeID (if IsWorker)
        - HotelID, HotelNeighbourhoodID
@@ -238,9 +325,18 @@ def assign_entities_to_city(population, city_name, cities, entities):
     city_entities = entities[city_name]
 
     # Assign each agent a local house from city_name
-    chosen_houses = [
-        random.choice(city_entities["houses"]) for _ in range(len(population))
-    ]
+    if "Size" in city_entities["houses"][0]:
+        house_slots = np.repeat(
+            np.arange(len(city_entities["houses"])),
+            [h["Size"] for h in city_entities["houses"]],
+        )
+        chosen_houses = [
+            city_entities["houses"][i] for i in np.random.permutation(house_slots)
+        ]
+    else:
+        chosen_houses = [
+            random.choice(city_entities["houses"]) for _ in range(len(population))
+        ]
     population["HouseID"] = [h["HouseID"] for h in chosen_houses]
     population["HouseNeighbourhoodID"] = [h["NeighbourhoodID"] for h in chosen_houses]
 
@@ -257,7 +353,14 @@ def assign_entities_to_city(population, city_name, cities, entities):
     travels_for_dicts = []
     essential_dicts = []
 
-    for i, row in population.iterrows():
+    # Draw every agent's office in each city up front
+    chosen_office_indices = {
+        c: samplers["offices"][c].sample_indices(len(population))
+        for c in cities
+        if entities[c]["offices"]
+    }
+
+    for i, (_, row) in enumerate(population.iterrows()):
         is_worker = row["IsWorker"]
 
         # For each city in the entire list:
@@ -273,7 +376,7 @@ def assign_entities_to_city(population, city_name, cities, entities):
             # Choose a random office if this agent is a worker; else 0
             if is_worker:
                 chosen_office = (
-                    random.choice(entities[c]["offices"])
+                    entities[c]["offices"][chosen_office_indices[c][i]]
                     if entities[c]["offices"]
                     else {"OfficeID": 0, "isEssential": 0}
                 )
@@ -294,7 +397,7 @@ def assign_entities_to_city(population, city_name, cities, entities):
 
             # Travel probability and travel duration (arbitrary example)
             travel_prob_map[c] = TRAVEL_PROB_MAP[c] if is_worker else 0
-            travels_for_map[c] = 7  # e.g., 7 days
+            travels_for_map[c] = TRAVEL_DURATION
 
         office_dicts.append(json.dumps(off_map))
         hotel_dicts.append(json.dumps(hot_map))
@@ -312,8 +415,182 @@ def assign_entities_to_city(population, city_name, cities, entities):
     population["IsEssentialWorkerMap"] = essential_dicts
 
 
+def sample_travel_itineraries(population, days=None):
+    """
+    Pre-samples the trips of every agent on days 0..`days` inclusive (the
+    simulator's last step is the start of day DAYS), following its daily
+    rule: an agent at home rolls against the travel probability of its
+    TravelCity at the start of each day, stays away for TRAVEL_DURATION
+    days, and only rolls again the day after returning.
+    Probabilities come from the agent's TravelProbabilities column, as in
+    the simulator, so a TravelCity outside CITIES never produces a trip.
+
+    The waiting time until the next trip is drawn from a geometric
+    distribution for all still-active agents at once, so the cost scales
+    with the number of trips rather than agents * days.
+
+    Returns the event table (AgentIndex, AgentID, StartDay, DestCity,
+    Duration) sorted by StartDay, and `offsets` of length days + 2 such that
+    the trips starting on day d are rows offsets[d]:offsets[d + 1]. `days`
+    defaults to DAYS.
+
+    AgentIndex is the key: the agent's 1-based row in `population`, i.e. its
+    index into the simulator's `agents` vector. AgentIDs are only kept for
+    reference, as they can repeat across cities of different sizes.
+    """
+    if days is None:
+        days = DAYS
+
+    travel_probs = np.array(
+        [
+            json.loads(probs).get(city, 0.0)
+            for probs, city in zip(
+                population["TravelProbabilities"], population["TravelCity"]
+            )
+        ],
+        dtype=float,
+    )
+
+    # Rows of the agents that can travel, and the first day they may leave
+    rows = np.flatnonzero(travel_probs > 0)
+    next_day = np.zeros(len(rows), dtype=np.int64)
+
+    event_rows = [np.empty(0, dtype=np.int64)]
+    event_days = [np.empty(0, dtype=np.int64)]
+    while len(rows):
+        # Number of daily rolls until (and including) the first success
+        start_day = next_day + np.random.geometric(travel_probs[rows]) - 1
+        travelling = start_day <= days
+        rows = rows[travelling]
+        start_day = start_day[travelling]
+
+        event_rows.append(rows)
+        event_days.append(start_day)
+
+        # Returning home takes the first day after the trip
+        next_day = start_day + TRAVEL_DURATION + 1
+
+    event_rows = np.concatenate(event_rows)
+    event_days = np.concatenate(event_days)
+    order = np.argsort(event_days, kind="stable")
+    event_rows = event_rows[order]
+    event_days = event_days[order]
+
+    events = pd.DataFrame(
+        {
+            "AgentIndex": event_rows + 1,
+            "AgentID": population["AgentID"].to_numpy()[event_rows],
+            "StartDay": event_days,
+            "DestCity": population["TravelCity"].to_numpy()[event_rows],
+            "Duration": TRAVEL_DURATION,
+        }
+    )
+    offsets = np.searchsorted(event_days, np.arange(days + 2))
+    return events, offsets
+
+
+def locality_order(city_codes, neighbourhood_ids, house_ids, daytime_ids):
+    """
+    Returns the permutation that sorts agents by city, then neighbourhood,
+    then the smallest daytime (office/school) place ID among their household's
+    members, then house, then their own daytime place. Members of a house end
+    up contiguous, and houses anchored to the same place end up next to each
+    other.
+    """
+    house_anchor = (
+        pd.Series(daytime_ids).groupby(house_ids).transform("min").to_numpy()
+    )
+    # np.lexsort sorts by the last key first
+    return np.lexsort(
+        (daytime_ids, house_ids, house_anchor, neighbourhood_ids, city_codes)
+    )
+
+
+def renumber_by_first_appearance(used_ids, all_ids):
+    """
+    Maps place IDs to 1..N in the order they first appear in `used_ids`,
+    followed by the unused IDs in `all_ids`. ID 0 ("none") maps to itself.
+    """
+    ordered = pd.unique(np.concatenate([used_ids, np.sort(all_ids)]))
+    ordered = ordered[ordered != 0]
+    mapping = {int(old): new for new, old in enumerate(ordered, start=1)}
+    mapping[0] = 0
+    return mapping
+
+
+def reorder_agents(df, entities):
+    """
+    Permutes the rows of `df` with locality_order() and renumbers houses,
+    offices and schools (in `df` and in `entities`) in order of first
+    appearance. AgentIDs are kept. Returns the reordered DataFrame and a
+    permutation table with each row's original position and place IDs.
+    """
+    office_maps = [json.loads(m) for m in df["OfficeIDs"]]
+    home_offices = np.array([m[c] for m, c in zip(office_maps, df["City"])])
+    is_worker = df["IsWorker"].to_numpy()
+    schools = df["SchoolID"].to_numpy()
+
+    # Workers spend the day at their home-city office, students at school
+    max_office = max(
+        (o["OfficeID"] for c in entities for o in entities[c]["offices"]), default=0
+    )
+    daytime_ids = np.where(is_worker, home_offices, max_office + schools)
+
+    order = locality_order(
+        pd.Categorical(df["City"], categories=CITIES).codes,
+        df["HouseNeighbourhoodID"].to_numpy(),
+        df["HouseID"].to_numpy(),
+        daytime_ids,
+    )
+
+    permutation = pd.DataFrame(
+        {
+            "AgentID": df["AgentID"].to_numpy()[order],
+            "OriginalRow": order,
+            "OriginalHouseID": df["HouseID"].to_numpy()[order],
+            "OriginalSchoolID": schools[order],
+            "OriginalOfficeIDs": df["OfficeIDs"].to_numpy()[order],
+        }
+    )
+    df = df.iloc[order].reset_index(drop=True)
+    office_maps = [office_maps[i] for i in order]
+    is_worker = is_worker[order]
+    is_student = df["IsStudent"].to_numpy()
+
+    house_map = renumber_by_first_appearance(
+        df["HouseID"].to_numpy(),
+        np.array([h["HouseID"] for c in entities for h in entities[c]["houses"]]),
+    )
+    office_map = renumber_by_first_appearance(
+        home_offices[order][is_worker],
+        np.array([o["OfficeID"] for c in entities for o in entities[c]["offices"]]),
+    )
+    school_map = renumber_by_first_appearance(
+        np.concatenate(
+            [df["SchoolID"].to_numpy()[is_student], df["SchoolID"].to_numpy()]
+        ),
+        np.array([s for c in entities for s in entities[c]["schools"]]),
+    )
+
+    df["HouseID"] = df["HouseID"].map(house_map)
+    df["SchoolID"] = df["SchoolID"].map(school_map)
+    df["OfficeIDs"] = [
+        json.dumps({c: office_map[o] for c, o in m.items()}) for m in office_maps
+    ]
+
+    for c in entities:
+        for house in entities[c]["houses"]:
+            house["HouseID"] = house_map[house["HouseID"]]
+        for office in entities[c]["offices"]:
+            office["OfficeID"] = office_map[office["OfficeID"]]
+        entities[c]["schools"] = [school_map[s] for s in entities[c]["schools"]]
+
+    return df, permutation
+
+
 def main():
     # -- Prepare to store data
+    samplers = build_samplers()
     populations = {}
     entities = {}
     all_data = []
@@ -330,12 +607,12 @@ def main():
     # -- Generate population and entities for each city
     for city_id, city_name in enumerate(CITIES):
         pop_size = TOTAL_POPULATION[city_id]
-        population_df = generate_population(city_name, city_id, pop_size)
+        population_df = generate_population(city_name, city_id, pop_size, samplers)
         populations[city_name] = population_df
 
         # Generate the entities (houses, offices, etc.)
         houses, hotels, offices, schools, neighbourhoods = generate_entities(
-            population_df, current_entity_count
+            population_df, current_entity_count, samplers
         )
         entities[city_name] = {
             "houses": houses,
@@ -344,6 +621,10 @@ def main():
             "schools": schools,
             "neighbourhoods": neighbourhoods,
         }
+        if offices:
+            samplers["offices"][city_name] = AliasTable(
+                np.arange(len(offices)), [o.get("Size", 1) for o in offices]
+            )
 
         # Update entity counts
         current_entity_count["houses"] += len(houses)
@@ -355,7 +636,7 @@ def main():
     # -- Assign entities across cities (including cross-city travel)
     for city_id, city_name in enumerate(CITIES):
         population = populations[city_name]
-        assign_entities_to_city(population, city_name, CITIES, entities)
+        assign_entities_to_city(population, city_name, CITIES, entities, samplers)
 
         travel_options = TRAVEL_MAP.get(city_name, {})
         assert travel_options
@@ -384,9 +665,22 @@ def main():
     pop_strs = [f"{int(p/1000)}k" for p in TOTAL_POPULATION]
     file_path = f"Ncities_{len(CITIES)}_" + "_".join(pop_strs)
 
+    if REORDER_AGENTS:
+        df, permutation = reorder_agents(df, entities)
+        permutation.to_csv(f"{file_path}_permutation.csv", index=False)
+        print(f"Permutation saved to {file_path}_permutation.csv")
+
     df.to_csv(f"{file_path}.csv", index=False)
     print(f"Data saved to {file_path}.csv")
 
+    if PRESAMPLE_TRAVEL:
+        events, offsets = sample_travel_itineraries(df)
+        events.to_csv(f"{file_path}_travel.csv", index=False)
+        pd.DataFrame({"Day": np.arange(len(offsets)), "Offset": offsets}).to_csv(
+            f"{file_path}_travel_offsets.csv", index=False
+        )
+        print(f"{len(events)} trips saved to {file_path}_travel.csv")
+
     # Optionally save entities if desired
     if SAVE_ENTITIES:
         with open(f"{file_path}.json", "w") as f:
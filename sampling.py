@@ -0,0 +1,121 @@
+import numpy as np
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table for drawing from a discrete distribution in O(1)
+    per draw. Build it once per distribution and reuse it for every batch.
+    """
+
+    def __init__(self, values, weights):
+        weights = np.asarray(weights, dtype=float)
+        if len(weights) == 0 or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("Weights must be non-negative with a positive sum")
+
+        self.values = np.asarray(values)
+        self.probabilities = weights / weights.sum()
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            if scaled[g] < 1.0:
+                small.append(g)
+            else:
+                large.append(g)
+        # Whatever is left over is 1 up to rounding error and keeps prob = 1
+
+        # Uniform tables (e.g. the defaults) never need the alias step
+        self.is_uniform = bool((self.prob >= 1.0).all())
+
+    @classmethod
+    def from_dict(cls, distribution):
+        """Builds a table from a {value: weight} dict."""
+        return cls(list(distribution.keys()), list(distribution.values()))
+
+    @classmethod
+    def from_bands(cls, bands):
+        """
+        Builds a table over integers from a {(low, high): weight} dict, with
+        each band's weight spread evenly over low <= x < high (e.g. an age
+        pyramid given in 5-year bands).
+        """
+        values = []
+        weights = []
+        for (low, high), weight in bands.items():
+            if high <= low:
+                raise ValueError(f"Empty band ({low}, {high})")
+            values.extend(range(low, high))
+            weights.extend([weight / (high - low)] * (high - low))
+        return cls(values, weights)
+
+    def sample_indices(self, size, out=None):
+        """
+        Draws `size` indices into the table, writing into `out` if given.
+        A single uniform per draw supplies both the column (integer part) and
+        the alias coin (fractional part).
+        """
+        n = len(self.prob)
+        if self.is_uniform:
+            indices = np.random.randint(0, n, size=size)
+            if out is None:
+                return indices
+            out[:] = indices
+            return out
+
+        u = np.random.random(size)
+        u *= n
+        if out is None:
+            out = np.empty(size, dtype=np.int64)
+        np.copyto(out, u, casting="unsafe")  # Truncates to the column
+        u -= out
+        use_alias = u >= self.prob[out]
+        out[use_alias] = self.alias[out[use_alias]]
+        return out
+
+    def sample(self, size, out=None, indices=None):
+        """
+        Draws `size` values, writing into `out` if given. `indices` is an
+        optional int64 buffer of length `size` for the drawn indices; it saves
+        one allocation, but the draw itself still uses a few temporaries.
+        """
+        indices = self.sample_indices(size, out=indices)
+        if out is None:
+            return self.values[indices]
+        np.take(self.values, indices, out=out)
+        return out
+
+    def mean(self):
+        """Expected value of a draw (numeric values only)."""
+        return float(np.dot(self.values, self.probabilities))
+
+
+def sample_sizes(table, total):
+    """
+    Draws place sizes from `table` until they cover exactly `total` members,
+    shrinking the last place to fit. Returns the sizes as an int array.
+    """
+    if (table.values < 1).any():
+        raise ValueError("Place sizes must be at least 1")
+
+    sizes = np.empty(0, dtype=np.int64)
+    if total <= 0:
+        return sizes
+    while sizes.sum() < total:
+        missing = total - sizes.sum()
+        batch = max(1, int(np.ceil(missing / table.mean() * 1.1)))
+        sizes = np.concatenate([sizes, table.sample(batch).astype(np.int64)])
+
+    last = np.searchsorted(np.cumsum(sizes), total)
+    sizes = sizes[: last + 1]
+    sizes[-1] -= sizes.sum() - total
+    return sizes